@@ -1,9 +1,12 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django import forms
 from django.contrib.auth.admin import UserAdmin
 from django.core.exceptions import ValidationError
+from django.http import HttpResponseRedirect
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import CustomUser, Category, Application
+from .models import CustomUser, Category, Application, ApplicationStatusChange
+from .transitions import InvalidTransition, TransitionError, VersionConflict, check_transition, save_with_version
 
 
 class CustomUserAdmin(UserAdmin):
@@ -16,6 +19,7 @@ class CustomUserAdmin(UserAdmin):
     fieldsets = (
         (None, {'fields': ('username', 'password')}),
         ('Персональная информация', {'fields': ('first_name', 'last_name', 'email')}),
+        ('Работа с заявками', {'fields': ('claim_categories',)}),
         ('Права доступа', {
             'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions'),
         }),
@@ -34,11 +38,23 @@ class ApplicationAdminForm(forms.ModelForm):
     class Meta:
         model = Application
         fields = '__all__'
+        widgets = {
+            'version': forms.HiddenInput,
+        }
 
     def clean(self):
         cleaned_data = super().clean()
         status = cleaned_data.get('status')
 
+        if self.instance.pk:
+            if cleaned_data.get('version') != self.instance.version:
+                raise ValidationError(str(VersionConflict()))
+            if status:
+                try:
+                    check_transition(self.instance.status, status)
+                except InvalidTransition as error:
+                    raise ValidationError(str(error))
+
 
         if status == 'P' and not cleaned_data.get('comment'):
             raise ValidationError('Для статуса "Принято в работу" необходим комментарий.')
@@ -53,23 +69,44 @@ class ApplicationAdminForm(forms.ModelForm):
 @admin.register(Application)
 class ApplicationAdmin(admin.ModelAdmin):
     form = ApplicationAdminForm
-    list_display = ['id', 'title', 'get_applicant', 'status', 'category', 'date',
+    list_display = ['id', 'title', 'get_applicant', 'status', 'priority', 'category', 'date',
                     'image_preview']
     list_filter = ['status', 'category', 'date']
     search_fields = ['title', 'applicant__username', 'description']
-    readonly_fields = ['date', 'image_preview_large', 'get_applicant']
-    list_editable = ['status']
+    # favorite меняют только действия закрепления в админ-панели, иначе форма затирала бы их.
+    readonly_fields = ['date', 'favorite', 'image_preview_large', 'get_applicant', 'claimed_by', 'claimed_until',
+                       'get_similar_application']
     list_per_page = 20
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).visible()
+
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        # Заявку могли изменить между проверкой формы и сохранением. Ошибка из save_model
+        # откатывает транзакцию формы целиком, поэтому нет ни записи в журнале, ни сообщения об успехе.
+        try:
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        except TransitionError as error:
+            messages.error(request, str(error))
+            return HttpResponseRedirect(request.get_full_path())
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            super().save_model(request, obj, form, change)
+            return
+        # Пишем только поля, изменённые в форме, чтобы не затереть параллельные изменения других полей.
+        changed = [name for name in form.changed_data if name in {f.name for f in obj._meta.concrete_fields}]
+        save_with_version(obj, form.cleaned_data['version'], request.user, extra_fields=changed)
+
     fieldsets = (
         ('Основная информация', {
             'fields': ('applicant', 'title', 'description', 'category', 'image')
         }),
         ('Статус и обработка', {
-            'fields': ('status', 'comment', 'design_image')
+            'fields': ('status', 'priority', 'comment', 'design_image', 'version', 'claimed_by', 'claimed_until')
         }),
         ('Дополнительно', {
-            'fields': ('date', 'favorite', 'image_preview_large', 'get_applicant'),
+            'fields': ('date', 'favorite', 'image_preview_large', 'get_applicant', 'get_similar_application'),
             'classes': ('collapse',)
         }),
     )
@@ -79,6 +116,14 @@ class ApplicationAdmin(admin.ModelAdmin):
 
     get_applicant.short_description = 'Пользователь'
 
+    def get_similar_application(self, obj):
+        fingerprint = getattr(obj, 'fingerprint', None)
+        if fingerprint and fingerprint.duplicate_of_id:
+            return f'#{fingerprint.duplicate_of_id}'
+        return "-"
+
+    get_similar_application.short_description = 'Похожее изображение в заявке'
+
     def image_preview(self, obj):
         if obj.image:
             return format_html(
@@ -102,15 +147,43 @@ class ApplicationAdmin(admin.ModelAdmin):
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'application_count']
+    list_display = ['name', 'application_count', 'is_deleted', 'purged_applications']
+    list_filter = ['is_deleted']
     search_fields = ['name']
     ordering = ['name']
+    readonly_fields = ['deleted_at', 'purged_applications']
 
     def application_count(self, obj):
         return obj.application_set.count()
 
     application_count.short_description = 'Количество заявок'
 
+    def delete_model(self, request, obj):
+        # Заявки удалённой категории удаляет по частям команда purge_deleted_categories.
+        obj.is_deleted = True
+        obj.deleted_at = timezone.now()
+        obj.save(update_fields=['is_deleted', 'deleted_at'])
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
+
+
+
+@admin.register(ApplicationStatusChange)
+class ApplicationStatusChangeAdmin(admin.ModelAdmin):
+    list_display = ['changed_at', 'application_id', 'from_status', 'to_status', 'version', 'changed_by']
+    list_filter = ['to_status', 'changed_at']
+    search_fields = ['application__title', 'changed_by__username']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 admin.site.register(CustomUser, CustomUserAdmin)
@@ -0,0 +1,50 @@
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Application, DailyCategoryStats
+
+
+def _bump(day, category_id, **deltas):
+    stats, _ = DailyCategoryStats.objects.get_or_create(day=day, category_id=category_id)
+    # Инкремент выполняется в самом UPDATE, поэтому параллельные запросы не теряют счёт.
+    DailyCategoryStats.objects.filter(pk=stats.pk).update(
+        **{field: F(field) + value for field, value in deltas.items()}
+    )
+
+
+def record_created(application):
+    _bump(timezone.localdate(application.date), application.category_id, created=1)
+
+
+def record_completed(application):
+    duration = max(0, int((application.completed_at - application.date).total_seconds()))
+    _bump(timezone.localdate(application.completed_at), application.category_id,
+          completed=1, completion_seconds=duration)
+
+
+def rebuild_daily_stats():
+    """Полностью пересчитывает сводки по таблице заявок."""
+    rows = {}
+
+    created = (Application.objects.annotate(day=TruncDate('date'))
+               .values('day', 'category_id').annotate(count=Count('id')))
+    for row in created:
+        stats = rows.setdefault((row['day'], row['category_id']), {})
+        stats['created'] = row['count']
+
+    completed = (Application.objects.filter(completed_at__isnull=False)
+                 .annotate(day=TruncDate('completed_at'))
+                 .values('day', 'category_id')
+                 .annotate(count=Count('id'), duration=Sum(F('completed_at') - F('date'))))
+    for row in completed:
+        stats = rows.setdefault((row['day'], row['category_id']), {})
+        stats['completed'] = row['count']
+        stats['completion_seconds'] = max(0, int(row['duration'].total_seconds()))
+
+    DailyCategoryStats.objects.all().delete()
+    DailyCategoryStats.objects.bulk_create(
+        DailyCategoryStats(day=day, category_id=category_id, **stats)
+        for (day, category_id), stats in rows.items()
+    )
+    return len(rows)
@@ -0,0 +1,44 @@
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Category
+
+VERSION_KEY = 'design:categories:version'
+
+_lock = threading.Lock()
+_cached = (None, ())
+
+
+def _shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_categories():
+    """Категории из памяти процесса; перечитываются, когда меняется общая версия в кеше."""
+    global _cached
+    version = _shared_version()
+    cached_version, categories = _cached
+    if cached_version == version:
+        return categories
+
+    with _lock:
+        if _cached[0] != version:
+            # Читаем из default: на отстающей реплике новая версия закрепилась бы за старыми данными.
+            _cached = (version, tuple(Category.objects.using('default').filter(is_deleted=False).order_by('pk')))
+        return _cached[1]
+
+
+def get_category_choices():
+    return [('', '---------')] + [(category.pk, category.name) for category in get_categories()]
+
+
+def invalidate_categories():
+    # Новая версия публикуется после фиксации, иначе другой процесс может перечитать старые данные.
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None))
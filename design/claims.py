@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Application
+
+# Сколько кандидатов перебирать за один проход: при одновременных запросах первые могут уйти к другим.
+CANDIDATES_PER_ATTEMPT = 20
+MAX_ATTEMPTS = 5
+
+
+def _free(now):
+    # Истёкшая аренда считается брошенной, и заявку можно забрать заново.
+    return Q(claimed_by__isnull=True) | Q(claimed_until__lt=now)
+
+
+def claim_next(user, category_id=None):
+    """Атомарно выдаёт сотруднику следующую свободную новую заявку в порядке приоритета.
+
+    Каждая попытка — условный UPDATE ... WHERE заявка всё ещё свободна, поэтому одну
+    заявку не получат двое, даже если они запрашивают её одновременно.
+    """
+    candidates = Application.objects.visible().filter(status='N').order_by('-priority', 'date')
+    if category_id:
+        candidates = candidates.filter(category_id=category_id)
+    else:
+        categories = list(user.claim_categories.values_list('pk', flat=True))
+        if categories:
+            candidates = candidates.filter(category_id__in=categories)
+
+    for _ in range(MAX_ATTEMPTS):
+        now = timezone.now()
+        ids = list(candidates.filter(_free(now)).values_list('pk', flat=True)[:CANDIDATES_PER_ATTEMPT])
+        if not ids:
+            return None
+        lease_until = now + timedelta(seconds=settings.CLAIM_LEASE_SECONDS)
+        for pk in ids:
+            claimed = Application.objects.filter(_free(now), pk=pk, status='N').update(
+                claimed_by=user, claimed_until=lease_until
+            )
+            if claimed:
+                return Application.objects.get(pk=pk)
+    return None
+
+
+def release_claim(application, user):
+    return Application.objects.filter(pk=application.pk, claimed_by=user).update(
+        claimed_by=None, claimed_until=None
+    )
+
+
+def active_claims(user):
+    return Application.objects.visible().filter(
+        claimed_by=user, claimed_until__gte=timezone.now(), status='N'
+    ).select_related('category').order_by('claimed_until')
@@ -0,0 +1,32 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+class ReplicaRouter:
+    """Чтение моделей приложения design в безопасных запросах уходит на реплики, запись — в default.
+
+    Пользователи и сессии всегда читаются из default: иначе сразу после входа
+    пользователь мог бы не найтись на отстающей реплике.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if not replicas or not read_from_replica.get():
+            return 'default'
+        if model._meta.app_label != 'design' or model._meta.model_name == 'customuser':
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает на реплики вместе с данными через sync_replicas.
+        return db == 'default'
@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.db.models import Q
+
+from .models import ImageFingerprint
+
+try:
+    from PIL import Image
+except ImportError:  # без Pillow поиск похожих изображений просто отключён
+    Image = None
+
+BANDS = 4
+BAND_BITS = 16
+BAND_MASK = (1 << BAND_BITS) - 1
+
+# Однотонные картинки и плавные градиенты дают хеш из почти одних нулей или единиц.
+# Такие хеши совпадают у совершенно разных изображений, поэтому их не индексируем и не сравниваем.
+MIN_HASH_BITS = 8
+MAX_HASH_BITS = 64 - MIN_HASH_BITS
+
+
+def image_hash(file):
+    """64-битный dHash: сравнение яркости соседних пикселей уменьшенного до 9×8 изображения.
+
+    Для изображений без достаточной детализации возвращает None, как и для нечитаемых файлов.
+    """
+    if Image is None:
+        return None
+    position = file.tell() if hasattr(file, 'tell') else None
+    try:
+        with Image.open(file) as image:
+            # Хешу хватает маленькой копии; уменьшение сначала экономит время на больших фото.
+            image.draft('RGB', (256, 256))
+            image.thumbnail((256, 256))
+            # Прозрачность накладываем на белый фон, как изображение видит человек.
+            image = image.convert('RGBA')
+            background = Image.new('RGBA', image.size, (255, 255, 255, 255))
+            gray = Image.alpha_composite(background, image).convert('L')
+            pixels = list(gray.resize((9, 8), Image.LANCZOS).getdata())
+    except (OSError, ValueError):
+        return None
+    finally:
+        if position is not None:
+            file.seek(position)
+
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            left = pixels[row * 9 + column]
+            right = pixels[row * 9 + column + 1]
+            value = (value << 1) | (left > right)
+    return value if is_informative(value) else None
+
+
+def is_informative(value):
+    return MIN_HASH_BITS <= bin(value).count('1') <= MAX_HASH_BITS
+
+
+def to_signed(value):
+    # BigIntegerField знаковый, поэтому 64-битный хеш хранится в дополнительном коде.
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def bands(value):
+    return [(value >> (BAND_BITS * index)) & BAND_MASK for index in range(BANDS)]
+
+
+def find_similar(value, applicant=None, exclude_application=None):
+    """Заявки с изображением на расстоянии Хэмминга не больше IMAGE_DUPLICATE_DISTANCE.
+
+    Порог меньше числа частей хеша, поэтому у любого совпадения хотя бы одна часть
+    совпадает точно, и кандидаты выбираются по индексам band0..band3 без полного перебора.
+    """
+    query = Q()
+    for index, band in enumerate(bands(value)):
+        query |= Q(**{f'band{index}': band})
+    # Заявки удалённых категорий пользователь уже не видит, поэтому и дубликатом их не считаем.
+    candidates = ImageFingerprint.objects.filter(query, application__category__is_deleted=False)
+    if applicant is not None:
+        candidates = candidates.filter(applicant=applicant)
+    if exclude_application is not None:
+        candidates = candidates.exclude(application=exclude_application)
+
+    matches = []
+    for application_id, stored in candidates.values_list('application_id', 'hash'):
+        distance = bin((stored & 0xffffffffffffffff) ^ value).count('1')
+        if distance <= settings.IMAGE_DUPLICATE_DISTANCE:
+            matches.append((distance, application_id))
+    return [application_id for _, application_id in sorted(matches)]
+
+
+# None у хеша значит «изображение без пригодного хеша», поэтому «ещё не считали» — отдельное значение.
+NOT_COMPUTED = object()
+
+
+def index_application(application, value=NOT_COMPUTED):
+    """Сохраняет отпечаток изображения заявки. value — уже посчитанный image_hash, если он есть."""
+    if value is NOT_COMPUTED:
+        with application.image.open('rb') as file:
+            value = image_hash(file)
+    if value is None:
+        return None
+
+    similar = find_similar(value, exclude_application=application)
+    band_values = bands(value)
+    fingerprint, _ = ImageFingerprint.objects.update_or_create(
+        application=application,
+        defaults={
+            'applicant_id': application.applicant_id,
+            'hash': to_signed(value),
+            'duplicate_of_id': similar[0] if similar else None,
+            **{f'band{index}': band for index, band in enumerate(band_values)},
+        },
+    )
+    return fingerprint
@@ -1,6 +1,8 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
+from .categories import get_category_choices
+from .fingerprints import find_similar, image_hash
 from .models import CustomUser, Application
 
 
@@ -91,6 +93,13 @@ class ApplicationForm(forms.ModelForm):
             'category': forms.Select
         }
 
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        self.image_hash = None
+        # Список для select берём из кеша категорий, а не запросом на каждый рендер.
+        self.fields['category'].widget.choices = get_category_choices()
+
     def clean_image(self):
         image = self.cleaned_data.get('image')
         max_file_size = 2 * 1024 * 1024
@@ -102,4 +111,10 @@ class ApplicationForm(forms.ModelForm):
         if image.content_type not in valid_mime_types:
             raise ValidationError("Файл должен быть в формате JPG, JPEG, PNG или BMP")
 
+        self.image_hash = image_hash(image)
+        if self.image_hash is not None and self.user is not None:
+            similar = find_similar(self.image_hash, applicant=self.user)
+            if similar:
+                raise ValidationError(f"Вы уже отправляли похожее изображение в заявке #{similar[0]}")
+
         return image
\ No newline at end of file
@@ -0,0 +1,261 @@
+import math
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+
+USER_PREFIX = 'loadtest-'
+PASSWORD = 'loadtest-password'
+STATUS_URL_RE = re.compile(r'/my-admin/status/(\d+)/')
+VERSION_RE = re.compile(r'name="version" value="(\d+)"')
+TABLE_ROW_RE = re.compile(r'<tr>(.*?)</tr>', re.S)
+# Успешный POST в этом приложении всегда заканчивается редиректом; 200 означает форму с ошибками.
+REDIRECT_CODES = (301, 302, 303)
+
+FLOW_WEIGHTS = {
+    'register': 1,
+    'applicant': 6,
+    'staff': 2,
+}
+
+
+def encode_number(number):
+    # Логин может содержать только латинские буквы и дефисы, поэтому цифры кодируем буквами.
+    letters = ''
+    while True:
+        number, rest = divmod(number, 26)
+        letters = chr(ord('a') + rest) + letters
+        if not number:
+            return letters
+
+
+def seed_username(number):
+    return f'{USER_PREFIX}{encode_number(number)}'
+
+
+def make_png(size=16):
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0)
+    # Случайный шум по всем пикселям: каждая картинка уникальна и не считается дубликатом предыдущих.
+    pixels = b''.join(b'\x00' + random.randbytes(3 * size) for _ in range(size))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(pixels)) + chunk(b'IEND', b''))
+
+
+def encode_multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for name, (file_name, content_type, content) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{file_name}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode() + content + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Client:
+    """HTTP-клиент одного виртуального пользователя со своими cookie."""
+
+    def __init__(self, base_url, results, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.results = results
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), NoRedirect)
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, label, path, data=None, files=None, confirm=None):
+        """Выполняет запрос и записывает его задержку и успешность.
+
+        GET успешен при коде меньше 400, POST — только при редиректе. Если view
+        редиректит и при ошибке, confirm проверяет результат отдельным запросом.
+        """
+        headers = {}
+        body = None
+        if data is not None:
+            data = dict(data, csrfmiddlewaretoken=self.csrf_token())
+            if files:
+                body, headers['Content-Type'] = encode_multipart(data, files)
+            else:
+                body = urlencode(data).encode()
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        request = Request(self.base_url + path, data=body, headers=headers)
+
+        started = time.perf_counter()
+        content = b''
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                content = response.read()
+                code = response.status
+        except HTTPError as error:
+            # Редиректы не выполняются, поэтому 3xx тоже приходят сюда.
+            code = error.code
+        except (URLError, OSError):
+            code = None
+        latency = time.perf_counter() - started
+
+        if code is None:
+            ok = False
+        elif data is None:
+            ok = code < 400
+        else:
+            ok = code in REDIRECT_CODES
+        if ok and confirm is not None:
+            ok = confirm()
+        self.results.append((label, latency, ok))
+        return ok, content.decode('utf-8', 'replace')
+
+    def login(self, username):
+        self.request('GET /login/', '/login/')
+        return self.request('POST /login/', '/login/', {'username': username, 'password': PASSWORD})[0]
+
+
+def register_flow(client, rng, context):
+    username = f'{USER_PREFIX}{encode_number(rng.getrandbits(48))}'
+    client.request('GET /register/', '/register/')
+    client.request('POST /register/', '/register/', {
+        'username': username,
+        'first_name': 'Тест',
+        'last_name': 'Нагрузка',
+        'email': f'{username}@example.com',
+        'password': PASSWORD,
+        'password_confirm': PASSWORD,
+        'agree_to_terms': 'on',
+    })
+
+
+def applicant_flow(client, rng, context):
+    if not client.login(seed_username(rng.randrange(context['users']))):
+        return
+    client.request('GET /create/', '/create/')
+    client.request('POST /create/', '/create/', {
+        'title': 'Нагрузочная заявка',
+        'description': 'Создано нагрузочным тестом',
+        'category': context['category_id'],
+    }, files={'image': ('loadtest.png', 'image/png', make_png())})
+    client.request('GET /profile/', '/profile/')
+
+
+def new_loadtest_applications(content):
+    """Новые заявки тестовых пользователей из таблицы панели: пары (id, версия).
+
+    Заявки настоящих пользователей нагрузочный тест не трогает.
+    """
+    found = {}
+    for row in TABLE_ROW_RE.findall(content):
+        if f'<td>{USER_PREFIX}' not in row or 'admin-status-new' not in row:
+            continue
+        pk, version = STATUS_URL_RE.search(row), VERSION_RE.search(row)
+        if pk and version:
+            found[pk.group(1)] = version.group(1)
+    return sorted(found.items())
+
+
+def staff_flow(client, rng, context):
+    if not client.login(context['staff_username']):
+        return
+    ok, content = client.request('GET /my-admin/', '/my-admin/')
+    applications = new_loadtest_applications(content)
+    if not applications:
+        return
+    pk, version = rng.choice(applications)
+
+    def status_updated():
+        # Панель редиректит и при конфликте версий; результат виден только в сообщении на следующей странице.
+        return 'Статус обновлен' in client.request('GET /my-admin/', '/my-admin/')[1]
+
+    client.request('POST /my-admin/status/<pk>/', f'/my-admin/status/{pk}/', {
+        'status': 'P',
+        'comment': 'Принято нагрузочным тестом',
+        'version': version,
+    }, confirm=status_updated)
+
+
+FLOWS = {
+    'register': register_flow,
+    'applicant': applicant_flow,
+    'staff': staff_flow,
+}
+
+
+def run_worker(options):
+    """Точка входа процесса: открытая модель нагрузки с пуассоновскими приходами."""
+    rng = random.Random(options['seed'])
+    results = []
+    lock = threading.Lock()
+    names = list(FLOW_WEIGHTS)
+    weights = [FLOW_WEIGHTS[name] for name in names]
+
+    def run_flow(name, flow_seed):
+        local_results = []
+        client = Client(options['base_url'], local_results, options['timeout'])
+        try:
+            FLOWS[name](client, random.Random(flow_seed), options)
+        finally:
+            with lock:
+                results.extend(local_results)
+
+    deadline = time.monotonic() + options['duration']
+    with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+        next_arrival = time.monotonic()
+        while next_arrival < deadline:
+            delay = next_arrival - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(run_flow, rng.choices(names, weights)[0], rng.getrandbits(64))
+            next_arrival += rng.expovariate(options['rate'])
+    return results
+
+
+def percentile(sorted_values, fraction):
+    # Метод ближайшего ранга: наименьшее значение, не меньше которого fraction всех замеров.
+    index = math.ceil(fraction * len(sorted_values)) - 1
+    return sorted_values[min(max(index, 0), len(sorted_values) - 1)]
+
+
+def summarize(results, elapsed):
+    by_endpoint = {}
+    for label, latency, ok in results:
+        by_endpoint.setdefault(label, []).append((latency, ok))
+
+    rows = []
+    for label in sorted(by_endpoint):
+        samples = by_endpoint[label]
+        latencies = sorted(latency for latency, _ in samples)
+        errors = sum(1 for _, ok in samples if not ok)
+        rows.append({
+            'endpoint': label,
+            'count': len(samples),
+            'rps': len(samples) / elapsed if elapsed else 0,
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p95': percentile(latencies, 0.95) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'error_rate': errors / len(samples),
+        })
+    return rows
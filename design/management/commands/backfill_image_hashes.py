@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from design.fingerprints import Image, index_application
+from design.models import Application
+
+
+class Command(BaseCommand):
+    help = 'Считает перцептивные хеши изображений заявок, у которых их ещё нет'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Сколько заявок читать из базы за один запрос')
+
+    def handle(self, *args, **options):
+        if Image is None:
+            self.stderr.write(self.style.ERROR('Для расчёта хешей нужен пакет Pillow'))
+            return
+
+        applications = (Application.objects.filter(fingerprint__isnull=True).exclude(image='')
+                        .order_by('pk').only('pk', 'applicant_id', 'image'))
+        indexed = skipped = 0
+        for application in applications.iterator(chunk_size=options['batch_size']):
+            try:
+                fingerprint = index_application(application)
+            except OSError:
+                fingerprint = None
+            if fingerprint is None:
+                skipped += 1
+                continue
+            indexed += 1
+            if fingerprint.duplicate_of_id:
+                self.stdout.write(f'Заявка #{application.pk} похожа на #{fingerprint.duplicate_of_id}')
+
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано: {indexed}, пропущено: {skipped}'))
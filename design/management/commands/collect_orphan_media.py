@@ -0,0 +1,95 @@
+import posixpath
+from datetime import timedelta
+from itertools import islice
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from design.models import Application, UploadChunk, UploadSession
+from design.signals import FILE_FIELDS
+
+
+def iter_storage_files(storage, path):
+    # Обходим каталоги по одному, не собирая весь список файлов в память.
+    directories, files = storage.listdir(path)
+    for file_name in files:
+        yield posixpath.join(path, file_name)
+    for directory in directories:
+        yield from iter_storage_files(storage, posixpath.join(path, directory))
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = 'Удаляет из media файлы, на которые не ссылается ни одна заявка или часть загрузки'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=24,
+                            help='Не трогать файлы моложе указанного числа часов')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Сколько имён файлов сверять с базой за один запрос')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать файлы, которые были бы удалены')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        dry_run = options['dry_run']
+        checked = removed = 0
+
+        locations = []
+        for field_name in FILE_FIELDS:
+            field = Application._meta.get_field(field_name)
+            locations.append((field.storage, field.upload_to.rstrip('/'), self.referenced_names))
+        # Части загрузок, чья строка не сохранилась, например после сбоя между записью файла и INSERT.
+        locations.append((default_storage, 'uploads', self.referenced_chunks))
+
+        for storage, prefix, referenced_names in locations:
+            if not storage.exists(prefix):
+                continue
+
+            for chunk in chunked(iter_storage_files(storage, prefix), options['chunk_size']):
+                checked += len(chunk)
+                referenced = referenced_names(chunk)
+                for name in chunk:
+                    if name in referenced:
+                        continue
+                    if storage.get_modified_time(name) > cutoff:
+                        continue
+                    removed += 1
+                    if dry_run:
+                        self.stdout.write(f'Будет удалён: {name}')
+                    else:
+                        storage.delete(name)
+                        self.stdout.write(f'Удалён: {name}')
+
+        # Брошенные загрузки по частям: их файлы частей удаляются сигналом вместе со строками.
+        stale_sessions = UploadSession.objects.filter(completed_at__isnull=True, created_at__lt=cutoff)
+        stale_count = stale_sessions.count()
+        if stale_count and not dry_run:
+            stale_sessions.delete()
+        if stale_count:
+            self.stdout.write(f'Незавершённых загрузок по частям к удалению: {stale_count}')
+
+        verb = 'Будет удалено' if dry_run else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(f'Проверено файлов: {checked}. {verb}: {removed}.'))
+
+    def referenced_names(self, names):
+        query = Q()
+        for field_name in FILE_FIELDS:
+            query |= Q(**{f'{field_name}__in': names})
+        referenced = set()
+        for row in Application.objects.filter(query).values_list(*FILE_FIELDS):
+            referenced.update(row)
+        return referenced
+
+    def referenced_chunks(self, names):
+        return set(UploadChunk.objects.filter(file__in=names).values_list('file', flat=True))
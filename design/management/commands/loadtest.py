@@ -0,0 +1,159 @@
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from design import loadtest
+from design.models import Application, Category, CustomUser
+
+CATEGORY_NAME = 'Нагрузочный тест'
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочное тестирование основных сценариев сайта'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Адрес уже запущенного сервера. '
+                                          'Без него сервер запускается локально')
+        parser.add_argument('--processes', type=int, default=2, help='Количество процессов-генераторов')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Одновременных сценариев на процесс')
+        parser.add_argument('--rate', type=float, default=10.0,
+                            help='Суммарная интенсивность приходов, сценариев в секунду')
+        parser.add_argument('--duration', type=float, default=30.0, help='Длительность теста в секундах')
+        parser.add_argument('--users', type=int, default=50, help='Сколько пользователей создать заранее')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Таймаут одного запроса')
+        parser.add_argument('--keep-throttle', action='store_true',
+                            help='Не отключать ограничение попыток входа на запущенном сервере. '
+                                 'Все запросы идут с одного IP, поэтому большая часть входов получит 429')
+        parser.add_argument('--cleanup', action='store_true',
+                            help='Удалить пользователей и заявки, созданные нагрузочным тестом')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self.cleanup()
+            return
+
+        if options['processes'] < 1 or options['concurrency'] < 1 or options['rate'] <= 0:
+            raise CommandError('Количество процессов, параллельность и интенсивность должны быть положительными')
+
+        context = self.seed(options['users'])
+        server = None
+        base_url = options['url']
+        if not base_url:
+            server, base_url = self.start_server(options['keep_throttle'])
+        elif settings.AUTH_THROTTLE['enabled']:
+            self.stdout.write(self.style.WARNING(
+                'Внешний сервер должен быть запущен с DESIGNPRO_AUTH_THROTTLE=0, '
+                'иначе входы с одного IP упрутся в ограничение попыток'
+            ))
+
+        try:
+            rows, elapsed = self.run(base_url, context, options)
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+        self.report(rows, elapsed)
+
+    def seed(self, count):
+        category, _ = Category.objects.get_or_create(name=CATEGORY_NAME, is_deleted=False)
+        existing = set(CustomUser.objects.filter(username__startswith=loadtest.USER_PREFIX)
+                       .values_list('username', flat=True))
+        # Хеш пароля считаем один раз: PBKDF2 на каждого пользователя сделал бы посев очень долгим.
+        password = make_password(loadtest.PASSWORD)
+        users = []
+        for number in range(count):
+            username = loadtest.seed_username(number)
+            if username not in existing:
+                users.append(CustomUser(username=username, email=f'{username}@example.com',
+                                        first_name='Тест', last_name='Нагрузка', password=password))
+        CustomUser.objects.bulk_create(users)
+
+        staff_username = f'{loadtest.USER_PREFIX}staff'
+        CustomUser.objects.update_or_create(
+            username=staff_username,
+            defaults={'email': f'{staff_username}@example.com', 'is_staff': True, 'password': password},
+        )
+        self.stdout.write(f'Подготовлено пользователей: {count} (+1 администратор)')
+        return {'users': count, 'staff_username': staff_username, 'category_id': category.id}
+
+    def start_server(self, keep_throttle):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        env = dict(os.environ)
+        if not keep_throttle:
+            env['DESIGNPRO_AUTH_THROTTLE'] = '0'
+        server = subprocess.Popen(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'runserver', '--noreload',
+             f'127.0.0.1:{port}'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                self.stdout.write(f'Сервер запущен на 127.0.0.1:{port}')
+                return server, f'http://127.0.0.1:{port}'
+            except OSError:
+                if server.poll() is not None:
+                    break
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError('Не удалось запустить локальный сервер')
+
+    def run(self, base_url, context, options):
+        processes = options['processes']
+        worker_options = [
+            dict(context,
+                 base_url=base_url,
+                 seed=index,
+                 rate=options['rate'] / processes,
+                 concurrency=options['concurrency'],
+                 duration=options['duration'],
+                 timeout=options['timeout'])
+            for index in range(processes)
+        ]
+        started = time.monotonic()
+        with multiprocessing.Pool(processes) as pool:
+            chunks = pool.map(loadtest.run_worker, worker_options)
+        elapsed = time.monotonic() - started
+        results = [sample for chunk in chunks for sample in chunk]
+        return loadtest.summarize(results, elapsed), elapsed
+
+    def report(self, rows, elapsed):
+        header = f'{"Эндпоинт":<32}{"Запросов":>10}{"RPS":>9}{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}{"Ошибки":>9}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in rows:
+            self.stdout.write(
+                f'{row["endpoint"]:<32}{row["count"]:>10}{row["rps"]:>9.1f}{row["p50"]:>10.1f}'
+                f'{row["p95"]:>10.1f}{row["p99"]:>10.1f}{row["error_rate"]:>9.1%}'
+            )
+        total = sum(row['count'] for row in rows)
+        self.stdout.write(self.style.SUCCESS(f'Всего запросов: {total} за {elapsed:.1f} с'))
+
+    def cleanup(self):
+        applications = Application.objects.filter(applicant__username__startswith=loadtest.USER_PREFIX)
+        deleted_applications = applications.count()
+        applications.delete()
+        users = CustomUser.objects.filter(username__startswith=loadtest.USER_PREFIX)
+        deleted_users = users.count()
+        users.delete()
+        # Категорию удаляем мягко, как admin_delete_category: её дневная статистика остаётся в истории.
+        for category in Category.objects.filter(name=CATEGORY_NAME, is_deleted=False, application__isnull=True):
+            category.is_deleted = True
+            category.deleted_at = timezone.now()
+            category.save(update_fields=['is_deleted', 'deleted_at'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено заявок: {deleted_applications}, пользователей: {deleted_users}'
+        ))
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from design.models import Application, Category
+
+
+class Command(BaseCommand):
+    help = 'Удаляет или переносит заявки удалённых категорий небольшими порциями'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Сколько заявок обрабатывать в одной транзакции')
+        parser.add_argument('--pause', type=float, default=0.2,
+                            help='Пауза между порциями в секундах, чтобы пропустить других писателей')
+        parser.add_argument('--reassign-to', type=int,
+                            help='ID категории, в которую перенести заявки вместо удаления')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('Размер порции должен быть положительным')
+
+        target = None
+        if options['reassign_to'] is not None:
+            try:
+                target = Category.objects.get(pk=options['reassign_to'], is_deleted=False)
+            except Category.DoesNotExist:
+                raise CommandError('Категория для переноса не найдена')
+
+        # Строка категории остаётся навсегда: на неё ссылается дневная статистика,
+        # которую каскадное удаление стёрло бы вместе с категорией.
+        categories = Category.objects.filter(is_deleted=True, application__isnull=False).distinct()
+        for category in categories:
+            self.purge(category, target, batch_size, options['pause'])
+
+    def purge(self, category, target, batch_size, pause):
+        remaining = Application.objects.filter(category=category)
+        total = category.purged_applications + remaining.count()
+
+        while True:
+            with transaction.atomic():
+                ids = list(remaining.values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                batch = Application.objects.filter(pk__in=ids)
+                if target:
+                    batch.update(category=target)
+                else:
+                    # Удаление через ORM, чтобы сработали сигналы и файлы удалились после фиксации.
+                    batch.delete()
+                Category.objects.filter(pk=category.pk).update(
+                    purged_applications=F('purged_applications') + len(ids)
+                )
+
+            category.refresh_from_db(fields=['purged_applications'])
+            self.stdout.write(f'«{category.name}»: {category.purged_applications}/{total}')
+            time.sleep(pause)
+
+        self.stdout.write(self.style.SUCCESS(f'Заявки категории «{category.name}» обработаны'))
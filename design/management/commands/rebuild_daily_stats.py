@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from design.analytics import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает дневную статистику заявок с нуля'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows = rebuild_daily_stats()
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано записей статистики: {rows}'))
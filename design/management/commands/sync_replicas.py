@@ -0,0 +1,43 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную SQLite-базу в локальные реплики (для проверки маршрутизации чтения)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help='Повторять синхронизацию с указанным интервалом в секундах')
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('Реплики не настроены: задайте переменную окружения DESIGNPRO_REPLICAS')
+
+        for alias in ['default'] + settings.REPLICA_DATABASES:
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'База {alias} не SQLite: используйте штатную репликацию СУБД')
+
+        while True:
+            self.sync()
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def sync(self):
+        source = sqlite3.connect(connections['default'].settings_dict['NAME'])
+        try:
+            for alias in settings.REPLICA_DATABASES:
+                connections[alias].close()
+                target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+                try:
+                    # backup() делает согласованный снимок, не блокируя писателей основной базы надолго.
+                    source.backup(target, pages=1024)
+                finally:
+                    target.close()
+                self.stdout.write(self.style.SUCCESS(f'Реплика {alias} синхронизирована'))
+        finally:
+            source.close()
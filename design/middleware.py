@@ -0,0 +1,118 @@
+import json
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse
+
+from .db_router import read_from_replica
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE = 'replica_pin'
+
+
+class ReplicaRoutingMiddleware:
+    """Включает чтение с реплик для безопасных запросов.
+
+    После собственного изменения пользователь на REPLICA_PIN_SECONDS закрепляется
+    за основной базой, чтобы сразу увидеть свою запись (read-your-writes).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        use_replica = request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES
+        token = read_from_replica.set(use_replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+
+        if request.method not in SAFE_METHODS and settings.REPLICA_DATABASES:
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+SHORT_CACHE_CONTROL = 'public, max-age=60'
+ENCODING_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        encoding, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q=') and quality[2:].strip() in ('0', '0.0', '0.00', '0.000'):
+            continue
+        accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class StaticAssetMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT без обращения к файловой системе за метаданными.
+
+    Индекс файлов, их сжатых вариантов и типов строится один раз при старте процесса.
+    Файлы с хешем в имени кешируются браузером навсегда (immutable), остальные — ненадолго.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith('/') else '/' + settings.STATIC_URL
+        self.files = self.build_index(settings.STATIC_ROOT)
+
+    def build_index(self, root):
+        if not root or not os.path.isdir(root):
+            return {}
+
+        hashed_names = set()
+        manifest_path = os.path.join(root, staticfiles_storage.manifest_name)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as manifest:
+                hashed_names = set(json.load(manifest).get('paths', {}).values())
+
+        files = {}
+        for directory, _, file_names in os.walk(root):
+            names = set(file_names)
+            for file_name in file_names:
+                if file_name.endswith(('.gz', '.br')) or file_name == staticfiles_storage.manifest_name:
+                    continue
+                path = os.path.join(directory, file_name)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                content_type, _ = mimetypes.guess_type(file_name)
+                variants = [(encoding, path + suffix) for encoding, suffix in ENCODING_SUFFIXES
+                            if file_name + suffix in names]
+                files[name] = {
+                    'path': path,
+                    'variants': variants,
+                    'content_type': content_type or 'application/octet-stream',
+                    'cache_control': IMMUTABLE_CACHE_CONTROL if name in hashed_names else SHORT_CACHE_CONTROL,
+                }
+        return files
+
+    def __call__(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefix):
+            return self.get_response(request)
+
+        asset = self.files.get(request.path[len(self.prefix):])
+        if asset is None:
+            return self.get_response(request)
+
+        path, encoding = asset['path'], None
+        if asset['variants']:
+            accepted = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+            for variant_encoding, variant_path in asset['variants']:
+                if variant_encoding in accepted:
+                    path, encoding = variant_path, variant_encoding
+                    break
+
+        response = FileResponse(open(path, 'rb'), content_type=asset['content_type'])
+        response['Cache-Control'] = asset['cache_control']
+        if asset['variants']:
+            response['Vary'] = 'Accept-Encoding'
+        if encoding:
+            response['Content-Encoding'] = encoding
+        return response
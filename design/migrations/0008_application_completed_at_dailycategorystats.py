@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('design', '0007_alter_application_applicant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата выполнения заявки'),
+        ),
+        migrations.CreateModel(
+            name='DailyCategoryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('created', models.PositiveIntegerField(default=0, verbose_name='Создано заявок')),
+                ('completed', models.PositiveIntegerField(default=0, verbose_name='Выполнено заявок')),
+                ('completion_seconds', models.PositiveBigIntegerField(default=0, verbose_name='Суммарное время выполнения, с')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='design.category', verbose_name='Категория')),
+            ],
+            options={
+                'verbose_name': 'Статистика за день',
+                'verbose_name_plural': 'Статистика по дням',
+                'ordering': ['-day'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'category'), name='unique_daily_category_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('design', '0008_application_completed_at_dailycategorystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='is_deleted',
+            field=models.BooleanField(default=False, verbose_name='Удалена'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='purged_applications',
+            field=models.PositiveIntegerField(default=0, verbose_name='Обработано заявок после удаления'),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='category',
+            field=models.ForeignKey(limit_choices_to={'is_deleted': False}, on_delete=django.db.models.deletion.CASCADE, to='design.category', verbose_name='Категория заявки'),
+        ),
+    ]
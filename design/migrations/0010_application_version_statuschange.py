@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('design', '0009_category_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='version',
+            field=models.PositiveIntegerField(default=0, verbose_name='Версия'),
+        ),
+        migrations.CreateModel(
+            name='ApplicationStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('N', 'Новая'), ('P', 'Принято в работу'), ('D', 'Выполнено')], max_length=1, verbose_name='Прежний статус')),
+                ('to_status', models.CharField(choices=[('N', 'Новая'), ('P', 'Принято в работу'), ('D', 'Выполнено')], max_length=1, verbose_name='Новый статус')),
+                ('version', models.PositiveIntegerField(verbose_name='Версия заявки')),
+                ('comment', models.TextField(blank=True, verbose_name='Комментарий')),
+                ('design_image', models.CharField(blank=True, max_length=100, verbose_name='Файл дизайна')),
+                ('changed_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата изменения')),
+                ('application', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='status_changes', to='design.application', verbose_name='Заявка')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Сотрудник')),
+            ],
+            options={
+                'verbose_name': 'Изменение статуса',
+                'verbose_name_plural': 'История статусов',
+                'ordering': ['-changed_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('design', '0010_application_version_statuschange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_applications', to=settings.AUTH_USER_MODEL, verbose_name='Взята сотрудником'),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Взята до'),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='priority',
+            field=models.SmallIntegerField(default=0, verbose_name='Приоритет'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='claim_categories',
+            field=models.ManyToManyField(blank=True, help_text='Из каких категорий сотруднику выдаются новые заявки. Пусто — из всех.', related_name='designers', to='design.category', verbose_name='Категории для работы'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['status', '-priority', 'date'], name='application_queue_idx'),
+        ),
+    ]
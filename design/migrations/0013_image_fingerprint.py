@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('design', '0012_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.BigIntegerField(verbose_name='Перцептивный хеш')),
+                ('band0', models.PositiveIntegerField(db_index=True)),
+                ('band1', models.PositiveIntegerField(db_index=True)),
+                ('band2', models.PositiveIntegerField(db_index=True)),
+                ('band3', models.PositiveIntegerField(db_index=True)),
+                ('applicant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('application', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprint', to='design.application', verbose_name='Заявка')),
+                ('duplicate_of', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='design.application', verbose_name='Похожа на заявку')),
+            ],
+            options={
+                'verbose_name': 'Отпечаток изображения',
+                'verbose_name_plural': 'Отпечатки изображений',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('design', '0013_image_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(condition=models.Q(('favorite', True)), fields=['-date'], name='application_pinned_idx'),
+        ),
+    ]
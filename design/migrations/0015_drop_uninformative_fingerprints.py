@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:25
+
+from django.db import migrations
+
+MIN_HASH_BITS = 8
+MAX_HASH_BITS = 64 - MIN_HASH_BITS
+
+
+def drop_uninformative_fingerprints(apps, schema_editor):
+    # Хеши однотонных изображений совпадали между несвязанными заявками: удаляем их
+    # и снимаем отметки о сходстве, которые на них ссылались.
+    ImageFingerprint = apps.get_model('design', 'ImageFingerprint')
+    dropped = []
+    for pk, application_id, value in ImageFingerprint.objects.values_list('pk', 'application_id', 'hash').iterator():
+        bits = bin(value & 0xffffffffffffffff).count('1')
+        if not MIN_HASH_BITS <= bits <= MAX_HASH_BITS:
+            dropped.append((pk, application_id))
+    for start in range(0, len(dropped), 500):
+        chunk = dropped[start:start + 500]
+        ImageFingerprint.objects.filter(duplicate_of_id__in=[application_id for _, application_id in chunk]).update(
+            duplicate_of=None
+        )
+        ImageFingerprint.objects.filter(pk__in=[pk for pk, _ in chunk]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('design', '0014_application_pinned_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_uninformative_fingerprints, migrations.RunPython.noop),
+    ]
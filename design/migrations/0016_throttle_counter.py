@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('design', '0015_drop_uninformative_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThrottleCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=20, verbose_name='Форма')),
+                ('result', models.CharField(max_length=20, verbose_name='Результат')),
+                ('count', models.PositiveBigIntegerField(default=0, verbose_name='Количество')),
+            ],
+            options={
+                'verbose_name': 'Счётчик ограничения попыток',
+                'verbose_name_plural': 'Счётчики ограничения попыток',
+                'constraints': [models.UniqueConstraint(fields=('scope', 'result'), name='unique_throttle_counter')],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:35
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('design', '0016_throttle_counter'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='ThrottleCounter',
+        ),
+    ]
@@ -1,3 +1,6 @@
+import math
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
@@ -19,6 +22,10 @@ class CustomUser(AbstractUser):
     first_name = models.CharField(_('Имя'), max_length=150, blank=True)
     last_name = models.CharField(_('Фамилия'), max_length=150, blank=True)
     email = models.EmailField(_('Email'), unique=True, blank=True)
+    claim_categories = models.ManyToManyField(
+        'Category', blank=True, related_name='designers', verbose_name='Категории для работы',
+        help_text='Из каких категорий сотруднику выдаются новые заявки. Пусто — из всех.',
+    )
 
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email', 'first_name', 'last_name']
@@ -29,6 +36,9 @@ class CustomUser(AbstractUser):
 
 class Category(models.Model):
     name = models.CharField(max_length=150, help_text="Название категории", verbose_name='Название')
+    is_deleted = models.BooleanField(default=False, verbose_name='Удалена')
+    deleted_at = models.DateTimeField(blank=True, null=True, verbose_name='Дата удаления')
+    purged_applications = models.PositiveIntegerField(default=0, verbose_name='Обработано заявок после удаления')
 
     class Meta:
         verbose_name = 'Категория'
@@ -38,12 +48,19 @@ class Category(models.Model):
         return self.name
 
 
+class ApplicationQuerySet(models.QuerySet):
+    def visible(self):
+        # Заявки удалённых категорий скрыты сразу, а физически удаляются командой purge_deleted_categories.
+        return self.filter(category__is_deleted=False)
+
+
 class Application(models.Model):
     applicant = models.ForeignKey(CustomUser, on_delete=models.CASCADE, verbose_name="Пользователь")
     title = models.CharField(max_length=150, verbose_name="Название заявки")
     description = models.TextField(max_length=500, verbose_name="Описание заявки")
     image = models.FileField(upload_to='applications/', verbose_name="Загрузите фото заявки")
-    category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name='Категория заявки')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name='Категория заявки',
+                                 limit_choices_to={'is_deleted': False})
     design_image = models.FileField(upload_to='designs/', verbose_name="Фото готового дизайна", blank=True, null=True)
 
     STATUS_CHOICES = [
@@ -53,13 +70,152 @@ class Application(models.Model):
     ]
     status = models.CharField(max_length=1, choices=STATUS_CHOICES, default="N", verbose_name='Статус заявки')
     date = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания заявки")
+    completed_at = models.DateTimeField(blank=True, null=True, verbose_name="Дата выполнения заявки")
     comment = models.TextField(blank=True, null=True, verbose_name="Комментарий к заявке")
     favorite = models.BooleanField(default=False, verbose_name='Добавить в избранное')
+    version = models.PositiveIntegerField(default=0, verbose_name='Версия')
+    priority = models.SmallIntegerField(default=0, verbose_name='Приоритет')
+    claimed_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, blank=True, null=True,
+                                   related_name='claimed_applications', verbose_name='Взята сотрудником')
+    claimed_until = models.DateTimeField(blank=True, null=True, verbose_name='Взята до')
+
+    objects = ApplicationQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Заявка'
         verbose_name_plural = 'Заявки'
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['status', '-priority', 'date'], name='application_queue_idx'),
+            # Частичный индекс: в нём только закреплённые заявки, поэтому список закреплённых
+            # читается быстро при любом размере таблицы.
+            models.Index(fields=['-date'], condition=models.Q(favorite=True), name='application_pinned_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class ApplicationStatusChange(models.Model):
+    # Без ограничения внешнего ключа: история остаётся и после удаления заявки.
+    application = models.ForeignKey(Application, on_delete=models.DO_NOTHING, db_constraint=False,
+                                    related_name='status_changes', verbose_name='Заявка')
+    changed_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, blank=True, null=True,
+                                   verbose_name='Сотрудник')
+    from_status = models.CharField(max_length=1, choices=Application.STATUS_CHOICES, verbose_name='Прежний статус')
+    to_status = models.CharField(max_length=1, choices=Application.STATUS_CHOICES, verbose_name='Новый статус')
+    version = models.PositiveIntegerField(verbose_name='Версия заявки')
+    comment = models.TextField(blank=True, verbose_name='Комментарий')
+    design_image = models.CharField(max_length=100, blank=True, verbose_name='Файл дизайна')
+    changed_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата изменения')
+
+    class Meta:
+        verbose_name = 'Изменение статуса'
+        verbose_name_plural = 'История статусов'
+        ordering = ['-changed_at']
+
+    def __str__(self):
+        return f'#{self.application_id}: {self.from_status} → {self.to_status}'
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('История статусов только дополняется')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('История статусов только дополняется')
+
+
+class UploadSession(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='upload_sessions',
+                                    verbose_name='Заявка')
+    created_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, verbose_name='Сотрудник')
+    file_name = models.CharField(max_length=255, verbose_name='Имя файла')
+    total_size = models.PositiveBigIntegerField(verbose_name='Размер файла')
+    chunk_size = models.PositiveIntegerField(verbose_name='Размер части')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата начала')
+    completed_at = models.DateTimeField(blank=True, null=True, verbose_name='Дата сборки')
+
+    class Meta:
+        verbose_name = 'Загрузка по частям'
+        verbose_name_plural = 'Загрузки по частям'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.file_name} ({self.pk})'
+
+    @property
+    def total_chunks(self):
+        return max(1, math.ceil(self.total_size / self.chunk_size))
+
+    def expected_chunk_size(self, index):
+        if index == self.total_chunks - 1:
+            return self.total_size - self.chunk_size * index
+        return self.chunk_size
+
+    def chunk_name(self, index):
+        return f'uploads/{self.pk}/{index:06d}.part'
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks',
+                                verbose_name='Загрузка')
+    index = models.PositiveIntegerField(verbose_name='Номер части')
+    size = models.PositiveIntegerField(verbose_name='Размер')
+    sha256 = models.CharField(max_length=64, verbose_name='SHA-256')
+    file = models.CharField(max_length=255, verbose_name='Файл части')
+
+    class Meta:
+        verbose_name = 'Часть загрузки'
+        verbose_name_plural = 'Части загрузки'
+        ordering = ['index']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='unique_upload_chunk'),
+        ]
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f'{self.session_id} #{self.index}'
+
+
+class ImageFingerprint(models.Model):
+    application = models.OneToOneField(Application, on_delete=models.CASCADE, related_name='fingerprint',
+                                       verbose_name='Заявка')
+    applicant = models.ForeignKey(CustomUser, on_delete=models.CASCADE, verbose_name='Пользователь')
+    hash = models.BigIntegerField(verbose_name='Перцептивный хеш')
+    # Хеш, разбитый на четыре 16-битные части: похожие изображения совпадают хотя бы в одной из них.
+    band0 = models.PositiveIntegerField(db_index=True)
+    band1 = models.PositiveIntegerField(db_index=True)
+    band2 = models.PositiveIntegerField(db_index=True)
+    band3 = models.PositiveIntegerField(db_index=True)
+    duplicate_of = models.ForeignKey(Application, on_delete=models.SET_NULL, blank=True, null=True,
+                                     related_name='+', verbose_name='Похожа на заявку')
+
+    class Meta:
+        verbose_name = 'Отпечаток изображения'
+        verbose_name_plural = 'Отпечатки изображений'
+
+    def __str__(self):
+        return f'{self.application_id}: {self.hash & 0xffffffffffffffff:016x}'
+
+
+class DailyCategoryStats(models.Model):
+    day = models.DateField(verbose_name='День')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name='Категория')
+    created = models.PositiveIntegerField(default=0, verbose_name='Создано заявок')
+    completed = models.PositiveIntegerField(default=0, verbose_name='Выполнено заявок')
+    completion_seconds = models.PositiveBigIntegerField(
+        default=0, verbose_name='Суммарное время выполнения, с'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика за день'
+        verbose_name_plural = 'Статистика по дням'
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category'], name='unique_daily_category_stats'),
+        ]
+
+    def __str__(self):
+        return f'{self.day} — {self.category}'
+
@@ -0,0 +1,68 @@
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import analytics
+from .categories import invalidate_categories
+from .models import Application, Category, UploadChunk
+
+FILE_FIELDS = ('image', 'design_image')
+
+
+def delete_file_on_commit(storage, name):
+    # Файл удаляется только после фиксации транзакции: при откате он остаётся на месте.
+    if name:
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(pre_save, sender=Application)
+def remember_old_values(sender, instance, **kwargs):
+    old = {}
+    if instance.pk:
+        old = sender.objects.filter(pk=instance.pk).values('status', *FILE_FIELDS).first() or {}
+    instance._old_values = old
+
+    if instance.status == 'D' and old.get('status') != 'D':
+        instance.completed_at = timezone.now()
+    elif instance.status != 'D':
+        instance.completed_at = None
+
+
+@receiver(post_save, sender=Application)
+def delete_replaced_files(sender, instance, **kwargs):
+    old_values = getattr(instance, '_old_values', {})
+    for field_name in FILE_FIELDS:
+        old_name = old_values.get(field_name)
+        field_file = getattr(instance, field_name)
+        if old_name and old_name != field_file.name:
+            delete_file_on_commit(field_file.storage, old_name)
+
+
+@receiver(post_save, sender=Application)
+def update_daily_stats(sender, instance, created, **kwargs):
+    old_values = getattr(instance, '_old_values', {})
+    if created:
+        analytics.record_created(instance)
+    if instance.status == 'D' and old_values.get('status') != 'D':
+        analytics.record_completed(instance)
+    instance._old_values = {}
+
+
+@receiver(post_delete, sender=Application)
+def delete_application_files(sender, instance, **kwargs):
+    for field_name in FILE_FIELDS:
+        field_file = getattr(instance, field_name)
+        delete_file_on_commit(field_file.storage, field_file.name)
+
+
+@receiver(post_delete, sender=UploadChunk)
+def delete_upload_chunk_file(sender, instance, **kwargs):
+    delete_file_on_commit(default_storage, instance.file)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_category_cache(sender, **kwargs):
+    invalidate_categories()
@@ -1,3 +1,277 @@
-from django.test import TestCase
+import hashlib
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.storage import default_storage
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import claims, uploads
+from .claims import claim_next
+from .models import Application, ApplicationStatusChange, Category, CustomUser, UploadChunk
+from .transitions import InvalidTransition, VersionConflict, save_with_version
+from .uploads import UploadError, assemble, start_session, store_chunk
+
+
+class StaticFilesTests(TestCase):
+    def test_pages_render_without_collectstatic(self):
+        # Тесты идут с DEBUG=False, а манифест появляется только после collectstatic.
+        response = self.client.get('/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '/static/css/style.css')
+
+
+class SaveWithVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user(username='staff', email='staff@example.com', is_staff=True)
+        cls.applicant = CustomUser.objects.create_user(username='applicant', email='applicant@example.com')
+        cls.category = Category.objects.create(name='Интерьер')
+
+    def setUp(self):
+        self.application = Application.objects.create(
+            applicant=self.applicant, title='Кухня', description='Описание',
+            category=self.category, image='applications/kitchen.png',
+        )
+
+    def test_saves_change_and_writes_audit_row(self):
+        self.application.status = 'P'
+        self.application.comment = 'Берём в работу'
+        save_with_version(self.application, 0, self.staff)
+
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'P')
+        self.assertEqual(self.application.version, 1)
+        change = ApplicationStatusChange.objects.get()
+        self.assertEqual((change.from_status, change.to_status, change.version), ('N', 'P', 1))
+        self.assertEqual(change.changed_by, self.staff)
+        self.assertEqual(change.comment, 'Берём в работу')
+
+    def test_stale_version_raises_conflict(self):
+        Application.objects.filter(pk=self.application.pk).update(version=1)
+        self.application.status = 'P'
+        self.application.comment = 'Устаревшая форма'
+
+        with self.assertRaises(VersionConflict):
+            save_with_version(self.application, 0, self.staff)
+
+        self.application.refresh_from_db()
+        self.assertEqual((self.application.status, self.application.version), ('N', 1))
+        self.assertFalse(ApplicationStatusChange.objects.exists())
+
+    def test_invalid_transition_is_rolled_back(self):
+        self.application.status = 'D'
+
+        with self.assertRaises(InvalidTransition):
+            save_with_version(self.application, 0, self.staff)
+
+        self.application.refresh_from_db()
+        self.assertEqual((self.application.status, self.application.version), ('N', 0))
+        self.assertFalse(ApplicationStatusChange.objects.exists())
+
+    def test_transition_is_checked_against_current_status(self):
+        # Форма открыта, пока заявка была новой, но в базе она уже в работе.
+        Application.objects.filter(pk=self.application.pk).update(status='P')
+        self.application.status = 'N'
+
+        with self.assertRaises(InvalidTransition):
+            save_with_version(self.application, 0, self.staff)
+
+    def test_keeps_columns_changed_outside_the_form(self):
+        stale = Application.objects.get(pk=self.application.pk)
+        Application.objects.filter(pk=self.application.pk).update(favorite=True, claimed_by=self.staff)
+
+        stale.status = 'P'
+        stale.comment = 'Берём в работу'
+        save_with_version(stale, 0, self.staff)
+
+        self.application.refresh_from_db()
+        self.assertTrue(self.application.favorite)
+        self.assertEqual(self.application.claimed_by, self.staff)
+
+
+class ClaimNextTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = CustomUser.objects.create_user(username='first', email='first@example.com', is_staff=True)
+        cls.second = CustomUser.objects.create_user(username='second', email='second@example.com', is_staff=True)
+        cls.applicant = CustomUser.objects.create_user(username='applicant', email='applicant@example.com')
+        cls.category = Category.objects.create(name='Интерьер')
+        cls.other_category = Category.objects.create(name='Ландшафт')
+
+    def create_application(self, title, category=None, **fields):
+        return Application.objects.create(
+            applicant=self.applicant, title=title, description='Описание',
+            category=category or self.category, image='applications/plan.png', **fields
+        )
+
+    def test_claims_highest_priority_first(self):
+        self.create_application('Обычная')
+        urgent = self.create_application('Срочная', priority=5)
+
+        claimed = claim_next(self.first)
+
+        self.assertEqual(claimed, urgent)
+        self.assertEqual(claimed.claimed_by, self.first)
+        self.assertGreater(claimed.claimed_until, timezone.now())
+
+    def test_claimed_application_is_not_given_twice(self):
+        application = self.create_application('Единственная')
+
+        self.assertEqual(claim_next(self.first), application)
+        self.assertIsNone(claim_next(self.second))
+        application.refresh_from_db()
+        self.assertEqual(application.claimed_by, self.first)
+
+    def test_concurrent_claim_moves_to_next_candidate(self):
+        contested = self.create_application('Первая', priority=1)
+        spare = self.create_application('Вторая')
+        calls = []
+        free = claims._free
+
+        def claimed_in_between(now):
+            # Второй вызов строит условие UPDATE: к этому моменту второй сотрудник
+            # уже прочитал кандидатов, а первый успевает забрать верхнюю заявку.
+            calls.append(now)
+            if len(calls) == 2:
+                Application.objects.filter(pk=contested.pk).update(
+                    claimed_by=self.first, claimed_until=now + timedelta(minutes=30)
+                )
+            return free(now)
+
+        with mock.patch.object(claims, '_free', side_effect=claimed_in_between):
+            claimed = claim_next(self.second)
+
+        self.assertEqual(claimed, spare)
+        contested.refresh_from_db()
+        self.assertEqual(contested.claimed_by, self.first)
+
+    def test_expired_lease_can_be_reclaimed(self):
+        application = self.create_application(
+            'Брошенная', claimed_by=self.first, claimed_until=timezone.now() - timedelta(minutes=1)
+        )
+
+        claimed = claim_next(self.second)
+
+        self.assertEqual(claimed, application)
+        self.assertEqual(claimed.claimed_by, self.second)
+
+    def test_only_new_applications_are_claimed(self):
+        self.create_application('В работе', status='P', comment='Уже делаем')
+
+        self.assertIsNone(claim_next(self.first))
+
+    def test_respects_claim_categories(self):
+        self.create_application('Интерьер')
+        garden = self.create_application('Сад', category=self.other_category)
+        self.first.claim_categories.add(self.other_category)
+
+        self.assertEqual(claim_next(self.first), garden)
+
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='design-tests-')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, CHUNKED_UPLOAD_CHUNK_SIZE=4)
+class ChunkedUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user(username='staff', email='staff@example.com', is_staff=True)
+        cls.category = Category.objects.create(name='Интерьер')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.application = Application.objects.create(
+            applicant=self.staff, title='Кухня', description='Описание',
+            category=self.category, image='applications/kitchen.png',
+        )
+        # 10 байт частями по 4: две полные части и последняя из двух байт.
+        self.session = start_session(self.application, self.staff, 'design.png', 10)
+
+    def store(self, index, data):
+        return store_chunk(self.session, index, data, hashlib.sha256(data).hexdigest())
+
+    def stored_files(self):
+        return default_storage.listdir(f'uploads/{self.session.pk}')[1]
+
+    def test_resent_chunk_is_not_stored_twice(self):
+        first = self.store(0, b'abcd')
+        again = self.store(0, b'abcd')
+
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual(len(self.stored_files()), 1)
+
+    def test_checksum_mismatch_is_rejected(self):
+        with self.assertRaises(UploadError):
+            store_chunk(self.session, 0, b'abcd', hashlib.sha256(b'dcba').hexdigest())
+
+        self.assertFalse(UploadChunk.objects.exists())
+
+    def test_assemble_requires_all_chunks(self):
+        self.store(0, b'abcd')
+        self.store(2, b'ij')
+
+        with self.assertRaises(UploadError):
+            assemble(self.session)
+
+    def test_assemble_joins_chunks_in_order(self):
+        self.store(2, b'ij')
+        self.store(0, b'abcd')
+        self.store(1, b'efgh')
+
+        design_file = assemble(self.session, hashlib.sha256(b'abcdefghij').hexdigest())
+        with design_file:
+            self.assertEqual(design_file.read(), b'abcdefghij')
+
+    def test_concurrent_insert_of_same_chunk_is_a_retry(self):
+        data = b'abcd'
+        save = default_storage.save
+
+        def save_after_other_request(name, content):
+            # Параллельный запрос успевает сохранить ту же часть, пока этот пишет файл.
+            UploadChunk(session=self.session, index=0, size=len(data), sha256=hashlib.sha256(data).hexdigest(),
+                        file=save(name, content)).save()
+            return save(name, content)
+
+        with mock.patch.object(uploads.default_storage, 'save', side_effect=save_after_other_request), \
+                mock.patch.object(UploadChunk.objects, 'create', side_effect=IntegrityError):
+            chunk = self.store(0, data)
+
+        self.assertEqual(chunk, UploadChunk.objects.get())
+        # Файл проигравшего запроса удалён, остался только файл сохранённой части.
+        self.assertEqual(self.stored_files(), [chunk.file.rsplit('/', 1)[1]])
+
+    def test_concurrent_insert_of_different_chunk_is_an_error(self):
+        save = default_storage.save
+
+        def save_after_other_request(name, content):
+            UploadChunk(session=self.session, index=0, size=4, sha256=hashlib.sha256(b'wxyz').hexdigest(),
+                        file=save(name, content)).save()
+            return save(name, content)
+
+        with mock.patch.object(uploads.default_storage, 'save', side_effect=save_after_other_request), \
+                mock.patch.object(UploadChunk.objects, 'create', side_effect=IntegrityError):
+            with self.assertRaises(UploadError):
+                self.store(0, b'abcd')
+
+        self.assertEqual(len(self.stored_files()), 1)
+
+    def test_complete_rejects_invalid_transition_before_assembling(self):
+        self.client.force_login(self.staff)
+        url = reverse('admin_upload_complete', args=[self.session.pk])
+
+        with mock.patch('design.views.assemble') as assemble_mock:
+            # Новую заявку нельзя сразу отметить выполненной.
+            response = self.client.post(url, {'status': 'D', 'version': 0})
+
+        self.assertEqual(response.status_code, 400)
+        assemble_mock.assert_not_called()
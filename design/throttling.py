@@ -0,0 +1,102 @@
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.connection import ConnectionProxy
+
+STATS_KEY = 'design:throttle:stats:{scope}:{result}'
+
+# Как django.core.cache.cache, только для отдельных кешей ограничения попыток.
+buckets = ConnectionProxy(caches, 'throttle_buckets')
+cache = ConnectionProxy(caches, 'throttle')
+
+
+def _key(kind, scope, identity):
+    # Имя пользователя может содержать что угодно, поэтому в ключ кеша идёт его хеш.
+    digest = hashlib.sha256(identity.encode()).hexdigest()
+    return f'design:throttle:{kind}:{scope}:{digest}'
+
+
+def _take_token(key, rate, burst, now):
+    """Token bucket в кеше: запас пополняется со скоростью rate в секунду до burst.
+
+    Чтение и запись состояния не атомарны, поэтому при гонке лимит может быть
+    превышен на единицы попыток — для защиты от перебора этого достаточно.
+    """
+    tokens, updated = buckets.get(key) or (burst, now)
+    tokens = min(burst, tokens + (now - updated) * rate)
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    buckets.set(key, (tokens, now), timeout=math.ceil(burst / rate) + 1)
+    return allowed
+
+
+def _count(scope, result):
+    # Счётчики живут в кеше ограничения, а не в базе: во время перебора каждая запись в SQLite
+    # конкурировала бы за блокировку со сменой статусов и загрузками. incr у этих бэкендов атомарный.
+    key = STATS_KEY.format(scope=scope, result=result)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def check_attempt(scope, ip, username):
+    """Возвращает 0, если попытку можно пропускать к проверке пароля, иначе — секунды до разблокировки."""
+    config = settings.AUTH_THROTTLE
+    now = time.time()
+    identities = [('ip', ip)]
+    if username:
+        identities.append(('username', username.lower()))
+
+    for kind, identity in identities:
+        locked_until = cache.get(_key('lockout', scope, f'{kind}:{identity}'))
+        if locked_until and locked_until > now:
+            return math.ceil(locked_until - now)
+
+    for kind, identity in identities:
+        limits = config[kind]
+        if not _take_token(_key('bucket', scope, f'{kind}:{identity}'), limits['rate'], limits['burst'], now):
+            lockout = config['lockout_seconds']
+            cache.set(_key('lockout', scope, f'{kind}:{identity}'), now + lockout, timeout=lockout)
+            return lockout
+    return 0
+
+
+def throttle_credentials(scope):
+    """Отсекает POST-попытки сверх лимита до того, как форма начнёт хешировать пароль."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'POST' or not settings.AUTH_THROTTLE['enabled']:
+                return view(request, *args, **kwargs)
+
+            retry_after = check_attempt(scope, request.META.get('REMOTE_ADDR', ''), request.POST.get('username', ''))
+            if retry_after:
+                _count(scope, 'rejected')
+                response = HttpResponse('Слишком много попыток. Повторите позже.', status=429,
+                                        content_type='text/plain; charset=utf-8')
+                response['Retry-After'] = str(retry_after)
+                return response
+
+            _count(scope, 'accepted')
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def throttle_stats():
+    """Счётчики с момента запуска; без общего THROTTLE_CACHE_URL — только этого процесса."""
+    stats = {}
+    for scope in ('login', 'register'):
+        stats[scope] = {
+            result: cache.get(STATS_KEY.format(scope=scope, result=result), 0)
+            for result in ('accepted', 'rejected')
+        }
+    return stats
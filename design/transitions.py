@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models import F
+
+from .models import Application, ApplicationStatusChange
+
+# Допустимые переходы N → P → D. Переход в тот же статус разрешён, чтобы обновить комментарий или дизайн.
+ALLOWED_TRANSITIONS = {
+    'N': {'N', 'P'},
+    'P': {'P', 'D'},
+    'D': {'D'},
+}
+
+STATUS_NAMES = dict(Application.STATUS_CHOICES)
+
+# Колонки, которые пишет версионированное сохранение. Остальные (favorite, claimed_by и т. п.)
+# меняются отдельными UPDATE без версии, и полное сохранение затёрло бы их устаревшими значениями.
+VERSIONED_FIELDS = ['status', 'comment', 'design_image', 'completed_at', 'version']
+
+
+class TransitionError(Exception):
+    pass
+
+
+class InvalidTransition(TransitionError):
+    def __init__(self, from_status, to_status):
+        super().__init__(
+            f'Недопустимая смена статуса: «{STATUS_NAMES.get(from_status, from_status)}» → '
+            f'«{STATUS_NAMES.get(to_status, to_status)}»'
+        )
+
+
+class VersionConflict(TransitionError):
+    def __init__(self):
+        super().__init__('Заявку уже изменил другой сотрудник. Обновите страницу и повторите изменение.')
+
+
+def check_transition(from_status, to_status):
+    if to_status not in ALLOWED_TRANSITIONS.get(from_status, set()):
+        raise InvalidTransition(from_status, to_status)
+
+
+def save_with_version(application, expected_version, user, extra_fields=()):
+    """Сохраняет изменения заявки, только если её версия в базе всё ещё равна expected_version.
+
+    Записываются только VERSIONED_FIELDS и явно переданные extra_fields.
+
+    Версия увеличивается условным UPDATE ... WHERE version = expected_version, поэтому из двух
+    одновременных изменений проходит только одно, а второе получает VersionConflict.
+    """
+    with transaction.atomic():
+        updated = Application.objects.filter(pk=application.pk, version=expected_version).update(
+            version=F('version') + 1
+        )
+        if not updated:
+            raise VersionConflict()
+
+        # Строка уже заблокирована нашим UPDATE, поэтому прочитанный статус не изменится до конца транзакции.
+        current_status = Application.objects.filter(pk=application.pk).values_list('status', flat=True).get()
+        check_transition(current_status, application.status)
+
+        application.version = expected_version + 1
+        application.save(update_fields=VERSIONED_FIELDS + [
+            field for field in extra_fields if field not in VERSIONED_FIELDS
+        ])
+
+        ApplicationStatusChange.objects.create(
+            application=application,
+            changed_by=user,
+            from_status=current_status,
+            to_status=application.status,
+            version=application.version,
+            comment=application.comment or '',
+            design_image=application.design_image.name or '',
+        )
+    return application
@@ -0,0 +1,90 @@
+import hashlib
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import UploadChunk, UploadSession
+
+
+class UploadError(Exception):
+    pass
+
+
+def start_session(application, user, file_name, total_size):
+    if total_size <= 0 or total_size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        raise UploadError('Недопустимый размер файла')
+    return UploadSession.objects.create(
+        application=application,
+        created_by=user,
+        file_name=file_name,
+        total_size=total_size,
+        chunk_size=settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+    )
+
+
+def store_chunk(session, index, data, sha256):
+    """Сохраняет часть файла. Повторная отправка той же части безопасна, что и даёт докачку."""
+    if session.completed_at:
+        raise UploadError('Загрузка уже завершена')
+    if not 0 <= index < session.total_chunks:
+        raise UploadError('Недопустимый номер части')
+    if len(data) != session.expected_chunk_size(index):
+        raise UploadError('Размер части не совпадает с ожидаемым')
+    if hashlib.sha256(data).hexdigest() != sha256.lower():
+        raise UploadError('Контрольная сумма части не совпадает')
+
+    sha256 = sha256.lower()
+    existing = UploadChunk.objects.filter(session=session, index=index).first()
+    if existing and existing.sha256 == sha256:
+        return existing
+
+    name = default_storage.save(session.chunk_name(index), ContentFile(data))
+    try:
+        with transaction.atomic():
+            UploadChunk.objects.filter(session=session, index=index).delete()
+            return UploadChunk.objects.create(session=session, index=index, size=len(data),
+                                              sha256=sha256, file=name)
+    except IntegrityError:
+        # Ту же часть одновременно сохранил параллельный запрос — обычно повтор клиента после таймаута.
+        default_storage.delete(name)
+        existing = UploadChunk.objects.filter(session=session, index=index).first()
+        if existing and existing.sha256 == sha256:
+            return existing
+        raise UploadError('Часть одновременно загружается другим запросом, повторите отправку')
+    except BaseException:
+        default_storage.delete(name)
+        raise
+
+
+def assemble(session, sha256=''):
+    """Склеивает части во временный файл и возвращает его как django File."""
+    chunks = list(session.chunks.order_by('index'))
+    if [chunk.index for chunk in chunks] != list(range(session.total_chunks)):
+        raise UploadError('Загружены не все части файла')
+
+    digest = hashlib.sha256()
+    assembled = tempfile.TemporaryFile()
+    for chunk in chunks:
+        with default_storage.open(chunk.file, 'rb') as part:
+            for block in iter(lambda: part.read(64 * 1024), b''):
+                digest.update(block)
+                assembled.write(block)
+
+    if sha256 and digest.hexdigest() != sha256.lower():
+        assembled.close()
+        raise UploadError('Контрольная сумма файла не совпадает')
+
+    assembled.seek(0)
+    return File(assembled, name=session.file_name)
+
+
+def finish_session(session):
+    # Части больше не нужны: их файлы удалит сигнал после фиксации транзакции.
+    session.completed_at = timezone.now()
+    session.save(update_fields=['completed_at'])
+    session.chunks.all().delete()
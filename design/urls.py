@@ -2,11 +2,13 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
+from .throttling import throttle_credentials
 
 urlpatterns = [
     path('', views.index, name='index'),
-    path('register/', views.Registration.as_view(), name='register'),
-    path('login/', auth_views.LoginView.as_view(template_name='main/login.html'), name='login'),
+    path('register/', throttle_credentials('register')(views.Registration.as_view()), name='register'),
+    path('login/', throttle_credentials('login')(auth_views.LoginView.as_view(template_name='main/login.html')),
+         name='login'),
     path('logout/', views.logout_view, name='logout'),
 
     path('profile/', views.Profile.as_view(), name='profile'),
@@ -14,7 +16,20 @@ urlpatterns = [
     path('application/<int:pk>/', views.ApplicationDetailView.as_view(), name='application-detail'),
     path('application/<int:pk>/delete/', views.delete_application, name='application-delete'),
     path('my-admin/', views.simple_admin_panel, name='simple_admin_panel'),
+    path('my-admin/analytics/', views.admin_analytics, name='admin_analytics'),
+    path('my-admin/throttle-stats/', views.admin_throttle_stats, name='admin_throttle_stats'),
     path('my-admin/status/<int:pk>/', views.admin_change_status, name='admin_change_status'),
+    path('my-admin/application/<int:pk>/upload/', views.admin_upload_start, name='admin_upload_start'),
+    path('my-admin/upload/<uuid:session_id>/', views.admin_upload_status, name='admin_upload_status'),
+    path('my-admin/upload/<uuid:session_id>/chunk/<int:index>/', views.admin_upload_chunk,
+         name='admin_upload_chunk'),
+    path('my-admin/upload/<uuid:session_id>/complete/', views.admin_upload_complete, name='admin_upload_complete'),
+    path('my-admin/application/<int:pk>/pin/', views.admin_pin_application, {'pinned': True},
+         name='admin_pin_application'),
+    path('my-admin/application/<int:pk>/unpin/', views.admin_pin_application, {'pinned': False},
+         name='admin_unpin_application'),
+    path('my-admin/claim/', views.admin_claim_next, name='admin_claim_next'),
+    path('my-admin/claim/<int:pk>/release/', views.admin_release_claim, name='admin_release_claim'),
     path('my-admin/category/delete/', views.admin_delete_category, name='admin_delete_category'),
     path('my-admin/category/add/', views.admin_add_category, name='admin_add_category'),
     path('my-admin/application/<int:pk>/delete/', views.delete_application, name='admin_delete_application'),
@@ -1,3 +1,9 @@
+import os
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Sum
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import login, logout, authenticate
@@ -6,15 +12,23 @@ from django.views import generic
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
 
 
+from .categories import get_categories
+from .claims import active_claims, claim_next, release_claim
+from .fingerprints import index_application
 from .forms import CustomUserCreatingForm, ApplicationForm
-from .models import CustomUser, Application, Category
+from .models import CustomUser, Application, Category, DailyCategoryStats, UploadSession
+from .throttling import throttle_stats
+from .transitions import TransitionError, VersionConflict, check_transition, save_with_version
+from .uploads import UploadError, assemble, finish_session, start_session, store_chunk
 
 
 def index(request):
-    completed_applications = Application.objects.filter(status="D").select_related('category').order_by('-date')[:4]
-    in_progress = Application.objects.filter(status="P").count()
+    completed_applications = Application.objects.visible().filter(status="D").select_related('category').order_by('-date')[:4]
+    in_progress = Application.objects.visible().filter(status="P").count()
     context = {
         'completed_applications': completed_applications,
         'in_progress': in_progress,
@@ -45,11 +59,12 @@ class Registration(generic.CreateView):
 @login_required
 def create_application(request):
     if request.method == "POST":
-        form = ApplicationForm(request.POST, request.FILES)
+        form = ApplicationForm(request.POST, request.FILES, user=request.user)
         if form.is_valid():
             application = form.save(commit=False)
             application.applicant = request.user
             application.save()
+            index_application(application, form.image_hash)
             messages.success(request, 'Заявка успешно создана!')
             return redirect('profile')
     else:
@@ -63,18 +78,22 @@ class Profile(LoginRequiredMixin, generic.View):
 
     def get(self, request):
         status_filter = request.GET.get('status', '')
+        pinned_filter = request.GET.get('pinned') == '1'
 
         if status_filter:
-            applications = Application.objects.filter(applicant=request.user, status=status_filter).order_by(
+            applications = Application.objects.visible().filter(applicant=request.user, status=status_filter).order_by(
                 '-date')
         else:
-            applications = Application.objects.filter(applicant=request.user).order_by(
+            applications = Application.objects.visible().filter(applicant=request.user).order_by(
                 '-date')
+        if pinned_filter:
+            applications = applications.filter(favorite=True)
 
         context = {
             'user': request.user,
             'applications': applications,
             'status_filter': status_filter,
+            'pinned_filter': pinned_filter,
             'status_choices': Application.STATUS_CHOICES,
         }
 
@@ -88,8 +107,8 @@ class ApplicationDetailView(LoginRequiredMixin, generic.DetailView):
 
     def get_queryset(self):
         if self.request.user.is_staff:
-            return Application.objects.all()
-        return Application.objects.filter(applicant=self.request.user)
+            return Application.objects.visible()
+        return Application.objects.visible().filter(applicant=self.request.user)
 
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
@@ -114,7 +133,7 @@ class ApplicationDetailView(LoginRequiredMixin, generic.DetailView):
 
 @login_required
 def delete_application(request, pk):
-    application = get_object_or_404(Application, pk=pk)
+    application = get_object_or_404(Application.objects.visible(), pk=pk)
 
     if application.applicant != request.user:
         messages.error(request, 'Вы не можете удалить эту заявку.')
@@ -134,29 +153,76 @@ def is_admin(user):
 
 @user_passes_test(is_admin, login_url='login')
 def simple_admin_panel(request):
+    applications = Application.objects.visible()
     stats = {
-        'total': Application.objects.count(),
-        'new': Application.objects.filter(status='N').count(),
-        'in_work': Application.objects.filter(status='P').count(),
-        'completed': Application.objects.filter(status='D').count(),
+        'total': applications.count(),
+        'new': applications.filter(status='N').count(),
+        'in_work': applications.filter(status='P').count(),
+        'completed': applications.filter(status='D').count(),
     }
 
-    recent_apps = Application.objects.select_related('applicant', 'category')[:10]
+    recent_apps = applications.select_related('applicant', 'category')[:10]
+    pinned_apps = applications.filter(favorite=True).select_related('applicant', 'category').order_by('-date')[:50]
 
-    categories = Category.objects.all()
+    categories = get_categories()
 
     context = {
         'stats': stats,
         'recent_apps': recent_apps,
+        'pinned_apps': pinned_apps,
         'categories': categories,
+        'my_claims': active_claims(request.user),
     }
 
     return render(request, 'admin/simple_panel.html', context)
 
 
+def _with_average_hours(rows):
+    for row in rows:
+        if row['completed']:
+            row['average_hours'] = row['completion_seconds'] / row['completed'] / 3600
+        else:
+            row['average_hours'] = None
+    return rows
+
+
+@user_passes_test(is_admin, login_url='login')
+def admin_analytics(request):
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), 365)
+    except ValueError:
+        days = 30
+
+    # Страница читает только сводную таблицу, поэтому не зависит от числа заявок.
+    since = timezone.localdate() - timedelta(days=days - 1)
+    stats = DailyCategoryStats.objects.filter(day__gte=since)
+    totals = dict(created=Sum('created'), completed=Sum('completed'), completion_seconds=Sum('completion_seconds'))
+
+    by_day = _with_average_hours(list(stats.values('day').annotate(**totals).order_by('-day')))
+    by_category = _with_average_hours(
+        # Имя удалённой категории можно занять заново, поэтому группируем по id, а не по имени.
+        list(stats.values('category_id', 'category__name', 'category__is_deleted')
+             .annotate(**totals).order_by('category__name', 'category_id'))
+    )
+
+    context = {
+        'days': days,
+        'by_day': by_day,
+        'by_category': by_category,
+    }
+
+    return render(request, 'admin/analytics.html', context)
+
+
+@user_passes_test(is_admin, login_url='login')
+@require_GET
+def admin_throttle_stats(request):
+    return JsonResponse(throttle_stats())
+
+
 @user_passes_test(is_admin, login_url='login')
 def admin_change_status(request, pk):
-    application = get_object_or_404(Application, pk=pk)
+    application = get_object_or_404(Application.objects.visible(), pk=pk)
 
     if request.method == 'POST':
         new_status = request.POST.get('status')
@@ -170,12 +236,23 @@ def admin_change_status(request, pk):
             messages.error(request, 'Для статуса "Выполнено" нужно загрузить дизайн')
             return redirect('simple_admin_panel')
 
+        try:
+            expected_version = int(request.POST.get('version', ''))
+        except ValueError:
+            messages.error(request, 'Не указана версия заявки. Обновите страницу и повторите изменение.')
+            return redirect('simple_admin_panel')
+
         application.status = new_status
         if comment:
             application.comment = comment
         if 'design_image' in request.FILES:
             application.design_image = request.FILES['design_image']
-        application.save()
+
+        try:
+            save_with_version(application, expected_version, request.user)
+        except TransitionError as error:
+            messages.error(request, str(error))
+            return redirect('simple_admin_panel')
 
         messages.success(request, 'Статус обновлен')
         return redirect('simple_admin_panel')
@@ -183,15 +260,169 @@ def admin_change_status(request, pk):
     return redirect('simple_admin_panel')
 
 
+def _upload_state(session):
+    return {
+        'id': str(session.pk),
+        'chunk_size': session.chunk_size,
+        'total_chunks': session.total_chunks,
+        'received': list(session.chunks.values_list('index', flat=True)),
+        'completed': session.completed_at is not None,
+    }
+
+
+def _json_error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+@user_passes_test(is_admin, login_url='login')
+@require_POST
+def admin_upload_start(request, pk):
+    application = get_object_or_404(Application.objects.visible(), pk=pk)
+    file_name = os.path.basename(request.POST.get('file_name', '')).strip()
+    if not file_name:
+        return _json_error('Не указано имя файла')
+    try:
+        total_size = int(request.POST.get('total_size', ''))
+        session = start_session(application, request.user, file_name, total_size)
+    except ValueError:
+        return _json_error('Не указан размер файла')
+    except UploadError as error:
+        return _json_error(str(error))
+
+    return JsonResponse(_upload_state(session), status=201)
+
+
+@user_passes_test(is_admin, login_url='login')
+@require_GET
+def admin_upload_status(request, session_id):
+    # По списку полученных частей клиент после обрыва докачивает только недостающие.
+    session = get_object_or_404(UploadSession, pk=session_id)
+    return JsonResponse(_upload_state(session))
+
+
+@user_passes_test(is_admin, login_url='login')
+@require_POST
+def admin_upload_chunk(request, session_id, index):
+    session = get_object_or_404(UploadSession, pk=session_id)
+    try:
+        store_chunk(session, index, request.body, request.headers.get('X-Chunk-SHA256', ''))
+    except UploadError as error:
+        return _json_error(str(error))
+
+    return JsonResponse({'index': index, 'received': session.chunks.count()})
+
+
+@user_passes_test(is_admin, login_url='login')
+@require_POST
+def admin_upload_complete(request, session_id):
+    session = get_object_or_404(UploadSession, pk=session_id, completed_at__isnull=True)
+    application = get_object_or_404(Application.objects.visible(), pk=session.application_id)
+    new_status = request.POST.get('status', 'D')
+    comment = request.POST.get('comment', '')
+
+    try:
+        expected_version = int(request.POST.get('version', ''))
+    except ValueError:
+        return _json_error('Не указана версия заявки')
+
+    if new_status == 'P' and not comment and not application.comment:
+        return _json_error('Для статуса "Принято в работу" нужен комментарий')
+
+    # Сборка копирует до CHUNKED_UPLOAD_MAX_SIZE байт, поэтому заведомо отклонённые запросы отсекаем до неё.
+    # save_with_version всё равно проверит версию и переход ещё раз под блокировкой.
+    if application.version != expected_version:
+        return _json_error(str(VersionConflict()), status=409)
+    try:
+        check_transition(application.status, new_status)
+    except TransitionError as error:
+        return _json_error(str(error))
+
+    try:
+        design_file = assemble(session, request.POST.get('sha256', ''))
+    except UploadError as error:
+        return _json_error(str(error))
+
+    application.status = new_status
+    if comment:
+        application.comment = comment
+    application.design_image = design_file
+    try:
+        with transaction.atomic():
+            save_with_version(application, expected_version, request.user)
+            finish_session(session)
+    except VersionConflict as error:
+        return _json_error(str(error), status=409)
+    except TransitionError as error:
+        return _json_error(str(error))
+    finally:
+        design_file.close()
+
+    return JsonResponse({
+        'status': application.status,
+        'version': application.version,
+        'design_image': application.design_image.url,
+    })
+
+
+@user_passes_test(is_admin, login_url='login')
+def admin_pin_application(request, pk, pinned):
+    if request.method == 'POST':
+        # Закрепление пишет только favorite и не трогает версию. Смена статуса (save_with_version)
+        # и форма Django admin это поле не сохраняют, поэтому закрепление не теряется.
+        if Application.objects.visible().filter(pk=pk).update(favorite=pinned):
+            messages.success(request, 'Заявка закреплена' if pinned else 'Заявка откреплена')
+        else:
+            messages.error(request, 'Заявка не найдена')
+
+    return redirect('simple_admin_panel')
+
+
+@user_passes_test(is_admin, login_url='login')
+def admin_claim_next(request):
+    if request.method == 'POST':
+        category_id = request.POST.get('category_id') or None
+        if category_id is not None:
+            try:
+                category_id = int(category_id)
+            except ValueError:
+                category_id = None
+            if category_id is None or not Category.objects.filter(id=category_id, is_deleted=False).exists():
+                messages.error(request, 'Категория не найдена')
+                return redirect('simple_admin_panel')
+
+        application = claim_next(request.user, category_id)
+        if application:
+            messages.success(request, f'Вам выдана заявка #{application.id} «{application.title}»')
+        else:
+            messages.error(request, 'Свободных новых заявок нет')
+
+    return redirect('simple_admin_panel')
+
+
+@user_passes_test(is_admin, login_url='login')
+def admin_release_claim(request, pk):
+    if request.method == 'POST':
+        application = get_object_or_404(Application, pk=pk)
+        if release_claim(application, request.user):
+            messages.success(request, f'Заявка #{application.id} возвращена в очередь')
+        else:
+            messages.error(request, 'Эта заявка не закреплена за вами')
+
+    return redirect('simple_admin_panel')
+
+
 @user_passes_test(is_admin, login_url='login')
 def admin_delete_category(request):
     if request.method == 'POST':
         category_id = request.POST.get('category_id')
         try:
-            category = Category.objects.get(id=category_id)
-            category_name = category.name
-            category.delete()
-            messages.success(request, f'Категория "{category_name}" удалена')
+            category = Category.objects.get(id=category_id, is_deleted=False)
+            # Категория сразу скрывается, а её заявки удаляются по частям командой purge_deleted_categories:
+            # каскадное удаление одной транзакцией надолго блокирует SQLite.
+            category.is_deleted = True
+            category.deleted_at = timezone.now()
+            category.save(update_fields=['is_deleted', 'deleted_at'])
+            messages.success(request, f'Категория "{category.name}" удалена')
         except Category.DoesNotExist:
             messages.error(request, 'Категория не найдена')
 
@@ -203,7 +434,7 @@ def admin_add_category(request):
     if request.method == 'POST':
         name = request.POST.get('name', '').strip()
         if name:
-            if Category.objects.filter(name=name).exists():
+            if Category.objects.filter(name=name, is_deleted=False).exists():
                 messages.error(request, 'Такая категория уже есть')
             else:
                 Category.objects.create(name=name)
@@ -32,12 +32,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'design.middleware.StaticAssetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'design.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'designpro.urls'
@@ -65,9 +67,59 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Транзакция сразу берёт блокировку записи. Иначе транзакция, которая сначала читает
+        # (update_or_create, форма админки), при записи получает «database is locked» без ожидания.
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
     }
 }
 
+# Реплики только для чтения, например DESIGNPRO_REPLICAS=db_replica1.sqlite3,db_replica2.sqlite3.
+# Для локальных SQLite-реплик данные копирует команда sync_replicas.
+REPLICA_DATABASES = []
+for index, replica_name in enumerate(filter(None, os.environ.get('DESIGNPRO_REPLICAS', '').split(',')), 1):
+    alias = f'replica{index}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / replica_name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['design.db_router.ReplicaRouter']
+
+# Сколько секунд после своей записи пользователь читает только из default.
+# Значение должно быть больше задержки репликации.
+REPLICA_PIN_SECONDS = int(os.environ.get('DESIGNPRO_REPLICA_PIN_SECONDS', 10))
+
+# Кеш ограничения попыток входа. Файловый кеш не годится: каждая запись перечисляет весь каталог.
+# По умолчанию — память процесса (запись и incr за O(1), но лимиты у каждого процесса свои);
+# для нескольких процессов задайте общий сервер: redis://host:6379/0 или memcached://host:11211.
+THROTTLE_CACHE_URL = os.environ.get('DESIGNPRO_THROTTLE_CACHE', '')
+
+
+def _throttle_cache(name, max_entries):
+    if THROTTLE_CACHE_URL.startswith(('redis://', 'rediss://', 'unix://')):
+        return {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                'LOCATION': THROTTLE_CACHE_URL, 'KEY_PREFIX': name}
+    if THROTTLE_CACHE_URL.startswith('memcached://'):
+        return {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+                'LOCATION': THROTTLE_CACHE_URL.removeprefix('memcached://'), 'KEY_PREFIX': name}
+    return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': name,
+            'OPTIONS': {'MAX_ENTRIES': max_entries}}
+
+
+# Общий кеш для всех процессов: версия справочника категорий и подобные ключи
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    },
+    # Корзины попыток — по ключу на каждый IP и логин, при переборе их много. Вытеснение корзины
+    # лишь возвращает ей полный запас, а блокировки лежат отдельно, и поток новых логинов их не вытесняет.
+    'throttle_buckets': _throttle_cache('design-throttle-buckets', 50000),
+    'throttle': _throttle_cache('design-throttle', 50000),
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -92,18 +144,52 @@ USE_TZ = True
 
 
 STATIC_URL = 'static/'
-STATICFILES_DIRS = [BASE_DIR / 'static']
-STATIC_ROOT = BASE_DIR
+STATICFILES_DIRS = [BASE_DIR / 'designpro' / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic пишет файлы с хешем в имени и сжатые варианты .gz/.br (если установлен brotli),
+# а StaticAssetMiddleware отдаёт их с долгим кешированием.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'design.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Тесты используют обычное хранилище статики, чтобы не требовать collectstatic перед прогоном.
+TEST_RUNNER = 'design.test_runner.DesignTestRunner'
 
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Загрузка готового дизайна по частям: часть должна помещаться в DATA_UPLOAD_MAX_MEMORY_SIZE
+CHUNKED_UPLOAD_CHUNK_SIZE = 1024 * 1024
+CHUNKED_UPLOAD_MAX_SIZE = 200 * 1024 * 1024
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
 AUTH_USER_MODEL = 'design.CustomUser'
 
+# Сколько секунд новая заявка закреплена за взявшим её сотрудником
+CLAIM_LEASE_SECONDS = 30 * 60
+
+# Ограничение попыток входа и регистрации до проверки пароля (token bucket, см. THROTTLE_CACHE_URL).
+# rate — сколько попыток восстанавливается в секунду, burst — запас попыток подряд.
+# DESIGNPRO_AUTH_THROTTLE=0 отключает ограничение (так делает команда loadtest для своего сервера).
+AUTH_THROTTLE = {
+    'enabled': os.environ.get('DESIGNPRO_AUTH_THROTTLE', '1') != '0',
+    'ip': {'rate': 20 / 60, 'burst': 20},
+    'username': {'rate': 5 / 60, 'burst': 5},
+    'lockout_seconds': 5 * 60,
+}
+
+# Максимальное расстояние Хэмминга между хешами похожих изображений (не больше 3: хеш делится на 4 части)
+IMAGE_DUPLICATE_DISTANCE = 3
+
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/profile/'
 LOGOUT_REDIRECT_URL = '/'